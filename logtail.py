@@ -3,21 +3,276 @@
 A Python implementation of 'tail -f' for continuously monitoring log files.
 """
 
+import io
+import os
 import sys
 import time
+import mmap
+import stat
+import ctypes
+import ctypes.util
+import select
+import struct
 import argparse
-from pathlib import Path
+from collections import deque
+
+
+# Size of the buffer each read() fills while following the file
+READ_SIZE = 1 << 20
+
+# Files up to this size are read whole rather than memory-mapped
+SMALL_FILE_SIZE = 1 << 20
+
+# inotify(7) constants, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVE_SELF = 0x00000800
+IN_DELETE_SELF = 0x00000400
+IN_NONBLOCK = 0o4000
+
+# struct inotify_event: wd, mask, cookie, len (followed by len bytes of name)
+_INOTIFY_EVENT = struct.Struct('iIII')
+
+
+def _load_libc():
+    """Return libc with the inotify calls available, or None if unsupported."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class FileWatcher:
+    """
+    Block until a file changes instead of waking up on a fixed interval.
+
+    Uses inotify on Linux and kqueue on macOS/BSD so the waiting thread sleeps
+    in the kernel until the file is written, moved or deleted. On other
+    platforms wait() simply sleeps for the timeout, which is the old polling
+    behaviour.
+    """
+
+    def __init__(self, filename):
+        self.fd = None
+        self._kqueue = None
+        if hasattr(select, 'kqueue'):
+            self._watch_kqueue(filename)
+        else:
+            self._watch_inotify(filename)
+
+    def _watch_inotify(self, filename):
+        libc = _load_libc()
+        if libc is None:
+            return
+
+        fd = libc.inotify_init1(IN_NONBLOCK)
+        if fd < 0:
+            return
+        mask = IN_MODIFY | IN_ATTRIB | IN_MOVE_SELF | IN_DELETE_SELF
+        if libc.inotify_add_watch(fd, os.fsencode(filename), mask) < 0:
+            os.close(fd)
+            return
+        self.fd = fd
+
+    def _watch_kqueue(self, filename):
+        # kqueue watches an open descriptor rather than a path
+        try:
+            fd = os.open(filename, os.O_RDONLY)
+        except OSError:
+            return
+        kq = select.kqueue()
+        event = select.kevent(
+            fd,
+            filter=select.KQ_FILTER_VNODE,
+            flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+            fflags=select.KQ_NOTE_WRITE | select.KQ_NOTE_EXTEND | select.KQ_NOTE_ATTRIB
+            | select.KQ_NOTE_RENAME | select.KQ_NOTE_DELETE,
+        )
+        try:
+            kq.control([event], 0)
+        except OSError:
+            kq.close()
+            os.close(fd)
+            return
+        self.fd = fd
+        self._kqueue = kq
+
+    @property
+    def polling(self):
+        """True when no kernel notification is available and wait() just sleeps"""
+        return self.fd is None
+
+    def wait(self, timeout):
+        """
+        Wait up to timeout seconds for the file to change.
+
+        Returns the OR of the inotify event masks received (kqueue events are
+        translated to the same IN_* flags), or 0 on timeout (always 0 when
+        polling).
+        """
+        if self.fd is None:
+            time.sleep(timeout)
+            return 0
+
+        if self._kqueue is not None:
+            return self._wait_kqueue(timeout)
+
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return 0
+
+        mask = 0
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                _, event_mask, _, name_len = _INOTIFY_EVENT.unpack_from(data, offset)
+                mask |= event_mask
+                offset += _INOTIFY_EVENT.size + name_len
+        return mask
+
+    def _wait_kqueue(self, timeout):
+        mask = 0
+        for event in self._kqueue.control(None, 4, timeout):
+            if event.fflags & (select.KQ_NOTE_WRITE | select.KQ_NOTE_EXTEND):
+                mask |= IN_MODIFY
+            if event.fflags & select.KQ_NOTE_ATTRIB:
+                mask |= IN_ATTRIB
+            if event.fflags & select.KQ_NOTE_RENAME:
+                mask |= IN_MOVE_SELF
+            if event.fflags & select.KQ_NOTE_DELETE:
+                mask |= IN_DELETE_SELF
+        return mask
+
+    def close(self):
+        if self._kqueue is not None:
+            self._kqueue.close()
+            self._kqueue = None
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def _file_replaced(fd, filename):
+    """Check whether filename no longer refers to the open file (log rotation)."""
+    try:
+        current = os.stat(filename)
+    except FileNotFoundError:
+        return True
+    opened = os.fstat(fd)
+    return (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino)
+
+
+def _reopen(filename, interval):
+    """Wait for filename to exist again and open it from the beginning."""
+    while True:
+        try:
+            return os.open(filename, os.O_RDONLY)
+        except FileNotFoundError:
+            time.sleep(interval)
+
+
+def _truncated(fd, position):
+    """Check whether a regular file has shrunk below the read position."""
+    if os.fstat(fd).st_size >= position:
+        return False
+    # /proc and sysfs files always report a size of 0; they are only
+    # truncated if there really is nothing left before the read position
+    if hasattr(os, 'pread'):
+        return os.pread(fd, 1, position - 1) == b''
+    return True
+
+
+def advise_sequential(fd):
+    """Tell the kernel the file will be read front to back, where supported."""
+    if hasattr(os, 'posix_fadvise'):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+
+def _last_lines_start(buf, lines):
+    """Return the offset in buf where its last N lines begin."""
+    end = len(buf)
+    # A newline at the very end terminates the last line, it does not start a new one
+    start = end - 1 if buf[end - 1] == ord('\n') else end
+    for _ in range(lines):
+        start = buf.rfind(b'\n', 0, start)
+        if start == -1:
+            break
+    return start + 1
+
+
+def read_last_lines(fd, lines):
+    """
+    Return the last N lines of an open file as bytes.
+
+    Small files are read with a single pread(). Larger ones are memory-mapped
+    and scanned backwards from the end, so only the pages holding those lines
+    are read, whatever the size of the file. Files that report no size, such
+    as pipes or /proc entries, are streamed through while keeping only the
+    last N lines.
+
+    The file offset is left just past the returned lines, so following can
+    carry on from there without missing anything appended meanwhile.
+    """
+    if lines <= 0:
+        return b''
+
+    st = os.fstat(fd)
+    size = st.st_size
+    if size == 0 or not stat.S_ISREG(st.st_mode):
+        with open(fd, 'rb', closefd=False) as file:
+            return b''.join(deque(file, maxlen=lines))
+
+    if size <= SMALL_FILE_SIZE and hasattr(os, 'pread'):
+        data = os.pread(fd, size, 0)
+        os.lseek(fd, len(data), os.SEEK_SET)
+        return data[_last_lines_start(data, lines):]
+
+    with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+        os.lseek(fd, len(mm), os.SEEK_SET)
+        return mm[_last_lines_start(mm, lines):]
+
+
+def _write_all(out, buffers):
+    """
+    Write several buffers to a binary stream as one write, using writev()
+    on the underlying descriptor where available to avoid joining them.
+    """
+    if not hasattr(os, 'writev'):
+        out.write(b''.join(buffers))
+        return
+
+    # Anything still buffered in the stream has to go out first
+    out.flush()
+    buffers = [memoryview(buf) for buf in buffers if buf]
+    while buffers:
+        written = os.writev(out.fileno(), buffers)
+        # Drop what was written and retry the rest after a short write
+        while buffers and written >= len(buffers[0]):
+            written -= len(buffers[0])
+            buffers.pop(0)
+        if written:
+            buffers[0] = buffers[0][written:]
 
 
 def tail_file(filename, interval=1.0, lines=10):
     """
     Continuously monitor a file and print new lines as they are added.
-    
+
     Args:
         filename: Path to the file to monitor
-        interval: Time in seconds between checks
+        interval: Time in seconds between checks (the wait timeout when
+            inotify is available)
         lines: Number of initial lines to display
-    
+
     # Basic usage - monitor a log file
     python logtail.py logfile.txt
 
@@ -30,55 +285,121 @@ def tail_file(filename, interval=1.0, lines=10):
     # Custom check interval (0.5 seconds)
     python logtail.py -s 0.5 logfile.txt
     """
+    fd = None
+    watcher = None
+    out = sys.stdout.buffer
     try:
-        file_path = Path(filename)
-        
-        if not file_path.exists():
+        # Opening is also the existence check, no separate stat needed
+        try:
+            fd = os.open(filename, os.O_RDONLY)
+        except FileNotFoundError:
             print(f"Error: File '{filename}' not found", file=sys.stderr)
             sys.exit(1)
-        
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
-            # Move to the end of the file
-            file.seek(0, 2)
-            file_size = file.tell()
-            
-            # If requested, show last N lines
-            if lines > 0:
-                file.seek(0)
-                all_lines = file.readlines()
-                for line in all_lines[-lines:]:
-                    print(line, end='')
-            
-            print(f"==> Monitoring {filename} for changes (Ctrl+C to stop) <==", file=sys.stderr)
+
+        # open() succeeds on a directory, only reading from it fails
+        st = os.fstat(fd)
+        if stat.S_ISDIR(st.st_mode):
+            print(f"Error: '{filename}' is a directory", file=sys.stderr)
+            sys.exit(1)
+
+        # Pipes and other special files cannot be seeked, truncated or advised
+        seekable = stat.S_ISREG(st.st_mode)
+
+        # If requested, show last N lines and carry on from where they end,
+        # otherwise jump straight to the end without reading anything
+        position = 0
+        if lines > 0:
+            out.write(read_last_lines(fd, lines))
+            out.flush()
+            if seekable:
+                position = os.lseek(fd, 0, os.SEEK_CUR)
+        elif seekable:
+            position = os.lseek(fd, 0, os.SEEK_END)
+
+        # From here on the file is only read forwards
+        if seekable:
+            advise_sequential(fd)
+
+        print(f"==> Monitoring {filename} for changes (Ctrl+C to stop) <==", file=sys.stderr)
+        watcher = FileWatcher(filename)
 
 
 # Continuously monitor the file
-            while True:
-                current_position = file.tell()
-                line = file.readline()
-                
-                if line:
-                    print(line, end='')
-                    sys.stdout.flush()
+        # Every read lands in the same buffer
+        reader = io.FileIO(fd, 'r', closefd=False)
+        buf = bytearray(READ_SIZE)
+        view = memoryview(buf)
+        # Bytes after the last newline read so far, held back until the line
+        # is complete
+        leftover = b''
+        # Whether the file may have shrunk since the last look at its size
+        check_size = True
+        while True:
+            n = reader.readinto(view)
+
+            if n:
+                position += n
+                end = buf.rfind(b'\n', 0, n) + 1
+                if end:
+                    # Finish the held-back line and write the complete lines
+                    # of this block together, without copying either
+                    _write_all(out, [leftover, view[:end]])
+                    leftover = bytes(view[end:n])
                 else:
-                    # Check if file was truncated
-                    file.seek(0, 2)
-                    new_size = file.tell()
-                    
-                    if new_size < current_position:
-                        # File was truncated, start from beginning
-                        print("\n==> File truncated, restarting from beginning <==", file=sys.stderr)
-                        file.seek(0)
-                    else:
-                        # No new data, wait a bit
-                        time.sleep(interval)
-                        
+                    leftover += view[:n]
+            else:
+                # Caught up with the file, push out everything written so far,
+                # including a line that is still being written, like tail -f
+                if leftover:
+                    out.write(leftover)
+                    leftover = b''
+                out.flush()
+
+                # Check if file was truncated
+                if check_size and seekable and _truncated(fd, position):
+                    # File was truncated, start from beginning
+                    print("\n==> File truncated, restarting from beginning <==", file=sys.stderr)
+                    position = os.lseek(fd, 0, os.SEEK_SET)
+                    leftover = b''
+                    continue
+
+                # No new data, block until the file changes
+                events = watcher.wait(interval)
+                # A wait that timed out without any event cannot hide a truncation
+                check_size = bool(events) or watcher.polling
+                if events & (IN_MOVE_SELF | IN_DELETE_SELF | IN_ATTRIB) and _file_replaced(fd, filename):
+                    # File was rotated, print what is left and follow the new one
+                    out.write(leftover)
+                    leftover = b''
+                    chunk = os.read(fd, READ_SIZE)
+                    while chunk:
+                        out.write(chunk)
+                        chunk = os.read(fd, READ_SIZE)
+                    out.flush()
+                    os.close(fd)
+                    fd = None
+                    watcher.close()
+                    print(f"\n==> {filename} has been replaced, following new file <==", file=sys.stderr)
+                    fd = _reopen(filename, interval)
+                    reader = io.FileIO(fd, 'r', closefd=False)
+                    seekable = stat.S_ISREG(os.fstat(fd).st_mode)
+                    if seekable:
+                        advise_sequential(fd)
+                    position = 0
+                    watcher = FileWatcher(filename)
+                    check_size = True
+
     except KeyboardInterrupt:
         print("\n==> Monitoring stopped <==", file=sys.stderr)
         sys.exit(0)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if watcher is not None:
+            watcher.close()
+        if fd is not None:
+            os.close(fd)
 
 
 def main():
@@ -102,7 +423,7 @@ def main():
         dest='interval',
         help='Sleep interval in seconds between checks (default: 1.0)'
     )
-    
+
     args = parser.parse_args()
     tail_file(args.filename, args.interval, args.lines)
 
@@ -4,29 +4,214 @@ A Kivy GUI application for continuously monitoring log files like 'tail -f'.
 Fixed version with correct indentation and working features.
 """
 
+import codecs
+import io
 import os
-import time
+import re
 import threading
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.textinput import TextInput
 from kivy.uix.checkbox import CheckBox
-from kivy.uix.scrollview import ScrollView
 from kivy.uix.filechooser import FileChooserListView
 from kivy.uix.popup import Popup
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.behaviors import LayoutSelectionBehavior
+from kivy.graphics import Color, Rectangle
+from kivy.properties import BooleanProperty
 from kivy.clock import Clock
 from kivy.core.window import Window
 from kivy.core.clipboard import Clipboard
+from kivy.core.text import Label as CoreLabel
+
+from logtail import FileWatcher, advise_sequential, read_last_lines
+
+# Size of the buffer each read() fills while following the file
+READ_SIZE = 1 << 20
+
+# How often followed text is flushed into the log display
+FLUSH_INTERVAL = 1 / 30.
+
+# Longest the follow thread waits for a change before checking whether to stop,
+# and how often it re-reads the file when change notification is unavailable
+FOLLOW_WAIT_TIMEOUT = 0.5
+FOLLOW_POLL_INTERVAL = 0.2
+
+# Only the most recent lines are kept in the log display
+MAX_DISPLAY_LINES = 5000
+
+# Log view row height and the background of selected rows
+ROW_HEIGHT = 18
+SELECTED_ROW_COLOR = (0.75, 0.85, 1, 1)
+
+# Log view rows use a monospaced font and are made wide enough for the
+# longest line, up to MAX_ROW_WIDTH pixels; only longer lines are shortened
+LOG_FONT = 'RobotoMono-Regular'
+LOG_FONT_SIZE = 12
+ROW_PADDING = 10
+MAX_ROW_WIDTH = 8192
+
+
+def split_lines(text):
+    """Split text into lines, ignoring the newline that ends the last one"""
+    if not text:
+        return []
+    if text.endswith('\n'):
+        text = text[:-1]
+    return text.split('\n')
+
+
+def filter_lines(lines, pattern):
+    """Return the lines that contain a match for pattern"""
+    # Search the joined text so the regex engine skips whole runs of
+    # non-matching lines in one call, then widen each hit to its line
+    text = '\n'.join(lines)
+    matching_lines = []
+    pos = 0
+    while True:
+        match = pattern.search(text, pos)
+        if not match:
+            break
+        start = text.rfind('\n', 0, match.start()) + 1
+        end = text.find('\n', match.start())
+        if end == -1:
+            end = len(text)
+        matching_lines.append(text[start:end])
+        pos = end + 1
+    return matching_lines
+
+
+class SelectableLabel(RecycleDataViewBehavior, Label):
+    """One row of the log view, selectable with a click"""
+
+    index = None
+    selected = BooleanProperty(False)
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('color', (0, 0, 0, 1))
+        kwargs.setdefault('font_name', LOG_FONT)
+        kwargs.setdefault('font_size', LOG_FONT_SIZE)
+        kwargs.setdefault('halign', 'left')
+        kwargs.setdefault('valign', 'middle')
+        kwargs.setdefault('shorten', True)
+        super().__init__(**kwargs)
+        self.bind(size=self.setter('text_size'))
+        with self.canvas.before:
+            self._background_color = Color(1, 1, 1, 1)
+            self._background = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self._update_background, size=self._update_background)
+
+    def _update_background(self, *args):
+        self._background.pos = self.pos
+        self._background.size = self.size
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.index = index
+        return super().refresh_view_attrs(rv, index, data)
+
+    def on_touch_down(self, touch):
+        if super().on_touch_down(touch):
+            return True
+        if self.collide_point(*touch.pos) and getattr(touch, 'button', 'left') == 'left':
+            return self.parent.select_with_touch(self.index, touch)
+        return False
+
+    def apply_selection(self, rv, index, is_selected):
+        self.selected = is_selected
+        self._background_color.rgba = SELECTED_ROW_COLOR if is_selected else (1, 1, 1, 1)
 
 
-class CopyableTextInput(TextInput):
-    """TextInput with right-click context menu for copying"""
+class SelectableRecycleBoxLayout(LayoutSelectionBehavior, RecycleBoxLayout):
+    """Row layout of the log view that tracks which rows are selected"""
+
+
+class LogView(RecycleView):
+    """
+    Log display that only creates widgets for the visible rows, with a
+    right-click context menu for copying
+    """
 
     def __init__(self, **kwargs):
+        kwargs.setdefault('do_scroll_x', True)
         super().__init__(**kwargs)
         self.context_menu = None
+        self.viewclass = SelectableLabel
+        # Every character is as wide as this one, so the widest row follows
+        # from the length of the longest line
+        sample = CoreLabel(text='M', font_name=LOG_FONT, font_size=LOG_FONT_SIZE)
+        sample.refresh()
+        self._char_width = sample.texture.width
+        self._longest_line = 0
+        layout = SelectableRecycleBoxLayout(
+            default_size=(None, ROW_HEIGHT),
+            default_size_hint=(1, None),
+            size_hint=(None, None),
+            orientation='vertical',
+            multiselect=True,
+            touch_multiselect=True,
+        )
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        self.bind(width=self._update_row_width)
+        self._update_row_width()
+
+    def _update_row_width(self, *args):
+        """Fit the rows to the longest line, or to the view if that is wider"""
+        width = min(self._longest_line * self._char_width + ROW_PADDING, MAX_ROW_WIDTH)
+        self.layout_manager.width = max(self.width, width)
+
+    def _fit_lines(self, lines, replace=False):
+        """Widen the rows for lines longer than any shown so far"""
+        # Rows only narrow again when all of them are replaced
+        longest = max(map(len, lines), default=0)
+        if replace or longest > self._longest_line:
+            self._longest_line = longest
+            self._update_row_width()
+
+    def set_lines(self, lines):
+        """Replace all rows"""
+        self.layout_manager.clear_selection()
+        self.data = [{'text': line} for line in lines]
+        self._fit_lines(lines, replace=True)
+
+    def add_lines(self, lines):
+        """Append rows after the existing ones"""
+        self.data.extend({'text': line} for line in lines)
+        self._fit_lines(lines)
+
+    def remove_first(self, count):
+        """Drop the first rows, keeping the remaining rows selected"""
+        manager = self.layout_manager
+        selected = [i - count for i in manager.selected_nodes if i >= count]
+        manager.clear_selection()
+        del self.data[:count]
+        for index in selected:
+            manager.select_node(index)
+
+    def set_last_line(self, line):
+        """Replace the text of the last row"""
+        if self.data:
+            self.data[-1] = {'text': line}
+            self._fit_lines([line])
+
+    def scroll_to_end(self):
+        self.scroll_y = 0
+
+    def show_row(self, index):
+        """Select a row and scroll it into view"""
+        self.layout_manager.clear_selection()
+        self.layout_manager.select_node(index)
+        if len(self.data) > 1:
+            self.scroll_y = 1 - index / (len(self.data) - 1)
 
     def on_touch_down(self, touch):
         if getattr(touch, 'button', None) == 'right' and self.collide_point(*touch.pos):
@@ -77,21 +262,23 @@ class CopyableTextInput(TextInput):
         self.context_menu.pos = (menu_x, menu_y)
 
     def copy_selected(self):
-        """Copy selected text to clipboard"""
-        if self.selection_text:
-            Clipboard.copy(self.selection_text)
-            print(f"Copied {len(self.selection_text)} characters to clipboard")
+        """Copy selected rows to clipboard"""
+        rows = [i for i in sorted(self.layout_manager.selected_nodes) if i < len(self.data)]
+        if rows:
+            text = '\n'.join(self.data[i]['text'] for i in rows)
+            Clipboard.copy(text)
+            print(f"Copied {len(rows)} lines to clipboard")
         else:
-            print("No text selected")
+            print("No lines selected")
 
         if self.context_menu:
             self.context_menu.dismiss()
 
     def copy_all(self):
-        """Copy all text to clipboard"""
-        if self.text:
-            Clipboard.copy(self.text)
-            print(f"Copied all {len(self.text)} characters to clipboard")
+        """Copy all rows to clipboard"""
+        if self.data:
+            Clipboard.copy('\n'.join(row['text'] for row in self.data))
+            print(f"Copied all {len(self.data)} lines to clipboard")
         else:
             print("No text to copy")
 
@@ -109,8 +296,35 @@ class LogTailApp(App):
         self.search_text = ''
         self.search_matches = []
         self.current_match_index = 0
+        # Display row of each entry in search_matches
+        self._match_rows = []
         self.case_sensitive = False
-        self.all_log_text = ''
+        # Lines shown by Show Matches, or None while the whole log is shown
+        self.filtered_lines = None
+        self._search_pattern = None
+        self._search_pattern_key = None
+        # Incremental index of find_next matches: the display text up to
+        # _search_scan_pos has already been scanned for _search_index_key
+        self._search_index_key = None
+        self._search_scan_pos = 0
+        self._search_resume_pos = 0
+        # Lowercased mirror of the display text for case-insensitive Find Next
+        self._lower_cache = ''
+        self._lower_cache_ok = True
+        # Show Matches scans run here, off the UI thread
+        self._search_executor = ThreadPoolExecutor(max_workers=1)
+        self._search_future = None
+        # Text read by the follow thread, waiting to be shown on the next flush
+        self._pending_lines = deque()
+        self._pending_lock = threading.Lock()
+        # Reused by every read of the follow thread
+        self._read_buf = bytearray(READ_SIZE)
+        # Last MAX_DISPLAY_LINES lines of the log, the source of the display text
+        self._line_ring = deque(maxlen=MAX_DISPLAY_LINES)
+        # Whether the last line in the ring is still waiting for its newline
+        self._line_open = False
+        # The rows of the log display joined by newlines, kept in step with it
+        self._display_text = ''
 
     def build(self):
         Window.size = (900, 700)
@@ -200,18 +414,22 @@ class LogTailApp(App):
         search_section.add_widget(clear_search_btn)
 
         # Log display section
-        scroll_view = ScrollView(size_hint=(1, 1))
-        self.log_display = CopyableTextInput(text='', readonly=True, multiline=True, font_size=12, background_color=(1, 1, 1, 1), foreground_color=(0, 0, 0, 1))
-        scroll_view.add_widget(self.log_display)
+        self.log_display = LogView(size_hint=(1, 1))
 
         main_layout.add_widget(path_section)
         main_layout.add_widget(status_section)
         main_layout.add_widget(follow_section)
         main_layout.add_widget(search_section)
-        main_layout.add_widget(scroll_view)
+        main_layout.add_widget(self.log_display)
+
+        Clock.schedule_interval(self._flush_pending, FLUSH_INTERVAL)
 
         return main_layout
 
+    def on_stop(self):
+        self.stop_following = True
+        self._search_executor.shutdown(wait=False, cancel_futures=True)
+
     def load_from_input(self, instance):
         file_path = self.path_input.text.strip()
         if not file_path:
@@ -257,15 +475,22 @@ class LogTailApp(App):
 
     def load_file(self, path):
         try:
-            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                text = f.read()
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                text = read_last_lines(fd, MAX_DISPLAY_LINES).decode('utf-8', errors='ignore')
+            finally:
+                os.close(fd)
         except Exception as e:
             self.status_label.text = f'Error opening file: {e}'
             return
         self.file_path = path
         self.file_label.text = os.path.basename(path)
-        self.log_display.text = text
-        self.all_log_text = ''  # Reset so we don't restore old filtered content
+        self._line_ring.clear()
+        self._line_ring.extend(split_lines(text))
+        self._line_open = not text.endswith('\n')
+        self._cancel_filter()
+        self.filtered_lines = None  # Reset so we don't restore old filtered content
+        self._show_ring()
         self.search_input.text = ''  # Clear search on new file
         self.status_label.text = f'Loaded {path}'
 
@@ -285,27 +510,110 @@ class LogTailApp(App):
 
     def _follow_file(self):
         try:
-            with open(self.file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                # Go to end
-                f.seek(0, os.SEEK_END)
-                while not self.stop_following:
-                    line = f.readline()
-                    if not line:
-                        time.sleep(0.2)
-                        continue
-                    Clock.schedule_once(lambda dt, l=line: self.append_text(l))
+            with io.FileIO(self.file_path, 'r') as f:
+                watcher = FileWatcher(self.file_path)
+                timeout = FOLLOW_POLL_INTERVAL if watcher.polling else FOLLOW_WAIT_TIMEOUT
+                try:
+                    # Go to end
+                    f.seek(0, os.SEEK_END)
+                    advise_sequential(f.fileno())
+                    view = memoryview(self._read_buf)
+                    # Holds back a character split across two reads; a line
+                    # split across reads is shown as is and completed by append_text
+                    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+                    while not self.stop_following:
+                        n = f.readinto(view)
+                        if not n:
+                            watcher.wait(timeout)
+                            continue
+                        text = decoder.decode(view[:n])
+                        if text:
+                            with self._pending_lock:
+                                self._pending_lines.append(text)
+                finally:
+                    watcher.close()
         except Exception as e:
-            Clock.schedule_once(lambda dt: setattr(self.status_label, 'text', f'Follow error: {e}'))
+            Clock.schedule_once(partial(self._set_status, f'Follow error: {e}'))
+
+    def _set_status(self, text, dt=None):
+        self.status_label.text = text
+
+    def _flush_pending(self, dt):
+        """Append everything the follow thread queued since the last flush"""
+        if not self._pending_lines:
+            return
+        with self._pending_lock:
+            chunk = ''.join(self._pending_lines)
+            self._pending_lines.clear()
+        self.append_text(chunk)
 
     def append_text(self, text):
-        self.log_display.text += text
-        self.log_display.cursor = (len(self.log_display.text), 0)
+        lines = split_lines(text)
+        # The first piece completes the last line if that one had no newline yet
+        continued = self._line_open and bool(self._line_ring) and bool(lines)
+        self._line_open = not text.endswith('\n')
+        if continued:
+            piece = lines.pop(0)
+            self._line_ring[-1] += piece
+            if self.filtered_lines is None:
+                self._display_text += piece
+                self.log_display.set_last_line(self._line_ring[-1])
+        # Lines pushed out of a full ring are trimmed from the top of the display
+        dropped = max(len(self._line_ring) + len(lines) - MAX_DISPLAY_LINES, 0)
+        dropped_chars = sum(len(line) + 1 for line in islice(self._line_ring, dropped))
+        self._line_ring.extend(lines)
+        # While matches are shown, clear_search brings the new lines in
+        if self.filtered_lines is not None:
+            return
+        if len(lines) >= MAX_DISPLAY_LINES:
+            self._show_ring()
+            return
+        if dropped:
+            self._trim_display(dropped, dropped_chars)
+        if lines:
+            appended = '\n'.join(lines)
+            self._display_text = self._display_text + '\n' + appended if self.log_display.data else appended
+        self.log_display.add_lines(lines)
+        self.log_display.scroll_to_end()
+
+    def _trim_display(self, rows, chars):
+        """Drop the first rows of the display and shift match offsets to the text that remains"""
+        self.log_display.remove_first(rows)
+        self._display_text = self._display_text[chars:]
+        gone = bisect_left(self.search_matches, chars)
+        self.search_matches = [pos - chars for pos in self.search_matches[gone:]]
+        self._match_rows = [row - rows for row in self._match_rows[gone:]]
+        self.current_match_index = max(self.current_match_index - gone, 0)
+        self._search_scan_pos = max(self._search_scan_pos - chars, 0)
+        self._search_resume_pos = max(self._search_resume_pos - chars, 0)
+        if self._lower_cache_ok:
+            self._lower_cache = self._lower_cache[chars:]
+        else:
+            self._reset_lower_cache()
+
+    def _show_ring(self):
+        """Rebuild the display from the line ring and scroll to the end"""
+        self._set_display(self._line_ring)
+        self.log_display.scroll_to_end()
+
+    def _set_display(self, lines):
+        """Replace the rows of the log display"""
+        self._display_text = '\n'.join(lines)
+        self._reset_search_index()
+        self._reset_lower_cache()
+        self.log_display.set_lines(lines)
 
     def stop_and_clear(self, instance):
         self.stop_following = True
         self.file_path = None
         self.file_label.text = 'No file loaded'
-        self.log_display.text = ''
+        with self._pending_lock:
+            self._pending_lines.clear()
+        self._line_ring.clear()
+        self._line_open = False
+        self._cancel_filter()
+        self.filtered_lines = None
+        self._set_display([])
         self.status_label.text = 'Cleared'
 
     def toggle_follow(self, checkbox, value):
@@ -315,6 +623,47 @@ class LogTailApp(App):
             self.stop_following = True
 
 
+    def _get_search_pattern(self, search_term, ignore_case):
+        """Compile the search term, reusing the last pattern while term and case are unchanged"""
+        key = (search_term, ignore_case)
+        if self._search_pattern_key != key:
+            flags = re.IGNORECASE if ignore_case else 0
+            self._search_pattern = re.compile(re.escape(search_term), flags)
+            self._search_pattern_key = key
+        return self._search_pattern
+
+    def _reset_search_index(self):
+        """Forget indexed matches after the display text changed other than by appending"""
+        self._search_index_key = None
+        self._search_scan_pos = 0
+        self._search_resume_pos = 0
+        self.search_matches = []
+        self._match_rows = []
+
+    def _reset_lower_cache(self):
+        """Forget the lowercased display text after it changed other than by appending"""
+        self._lower_cache = ''
+        self._lower_cache_ok = True
+
+    def _lowered_text(self, text):
+        """
+        Lowercased copy of the display text, extended as lines are appended.
+
+        Returns None if lowercasing changed the length of the text, since
+        offsets into the copy would no longer line up with the display.
+        """
+        if len(self._lower_cache) > len(text):
+            self._reset_lower_cache()
+        if self._lower_cache_ok and len(self._lower_cache) < len(text):
+            appended = text[len(self._lower_cache):]
+            lowered = appended.lower()
+            if len(lowered) == len(appended):
+                self._lower_cache += lowered
+            else:
+                self._lower_cache = ''
+                self._lower_cache_ok = False
+        return self._lower_cache if self._lower_cache_ok else None
+
     def find_next(self, instance):
         """Find and navigate to next matching text"""
         search_term = self.search_input.text
@@ -323,21 +672,40 @@ class LogTailApp(App):
             return
         
         self.search_text = search_term
-        text_to_search = self.log_display.text
+        text = self._display_text
         
-        if not self.case_sensitive:
-            text_to_search = text_to_search.lower()
+        # A plain search of the lowercased copy is much faster than IGNORECASE
+        haystack = text if self.case_sensitive else self._lowered_text(text)
+        if self.case_sensitive:
+            pattern = self._get_search_pattern(search_term, False)
+        elif haystack is not None:
             search_term = search_term.lower()
+            pattern = self._get_search_pattern(search_term, False)
+        else:
+            haystack = text
+            pattern = self._get_search_pattern(search_term, True)
         
-        # Find all matches
-        self.search_matches = []
-        start = 0
-        while True:
-            pos = text_to_search.find(search_term, start)
-            if pos == -1:
-                break
+        # The lowercased term compiles to the same pattern as a case-sensitive
+        # search for it, so the case mode has to be part of the key
+        index_key = (pattern, self.case_sensitive)
+        if self._search_index_key != index_key or self._search_scan_pos > len(text):
+            self._reset_search_index()
+            self._search_index_key = index_key
+        
+        # Only scan text appended since the last search; a match may straddle
+        # the old end, so back up by the term length but never into the last match
+        start = max(self._search_resume_pos, self._search_scan_pos - len(search_term) + 1, 0)
+        # Rows are counted on from the previous match, so only new text is counted
+        for match in pattern.finditer(haystack, start):
+            pos = match.start()
+            if self.search_matches:
+                row = self._match_rows[-1] + text.count('\n', self.search_matches[-1], pos)
+            else:
+                row = text.count('\n', 0, pos)
             self.search_matches.append(pos)
-            start = pos + 1
+            self._match_rows.append(row)
+            self._search_resume_pos = match.end()
+        self._search_scan_pos = len(text)
         
         if not self.search_matches:
             self.status_label.text = f'No matches found for "{search_term}"'
@@ -347,8 +715,7 @@ class LogTailApp(App):
         if self.current_match_index >= len(self.search_matches):
             self.current_match_index = 0
         
-        match_pos = self.search_matches[self.current_match_index]
-        self.log_display.cursor = (match_pos, 0)
+        self.log_display.show_row(self._match_rows[self.current_match_index])
         
         self.status_label.text = f'Match {self.current_match_index + 1} of {len(self.search_matches)}'
         self.current_match_index = (self.current_match_index + 1) % len(self.search_matches)
@@ -360,41 +727,57 @@ class LogTailApp(App):
             self.status_label.text = 'Enter search text'
             return
         
-        self.all_log_text = self.log_display.text
-        lines = self.all_log_text.split('\n')
-        matching_lines = []
-        
-        for line in lines:
-            if self.case_sensitive:
-                if search_term in line:
-                    matching_lines.append(line)
-            else:
-                if search_term.lower() in line.lower():
-                    matching_lines.append(line)
+        # Scan a snapshot of the log on the worker so the UI keeps drawing
+        self._cancel_filter()
+        pattern = self._get_search_pattern(search_term, not self.case_sensitive)
+        future = self._search_executor.submit(filter_lines, list(self._line_ring), pattern)
+        self._search_future = future
+        future.add_done_callback(self._on_filter_done)
+        self.status_label.text = 'Searching\u2026'
+
+    def _cancel_filter(self):
+        """Drop the running Show Matches scan, if any"""
+        if self._search_future:
+            self._search_future.cancel()
+            self._search_future = None
+
+    def _on_filter_done(self, future):
+        # Runs on the worker thread; widgets may only be touched from the UI thread
+        Clock.schedule_once(partial(self._apply_filter_result, future))
+
+    def _apply_filter_result(self, future, dt=None):
+        """Show the lines found by a Show Matches scan, unless it was superseded"""
+        if future is not self._search_future:
+            return
+        self._search_future = None
+        matching_lines = future.result()
         
         if not matching_lines:
             self.status_label.text = f'No matching lines found'
             return
         
-        self.log_display.text = '\n'.join(matching_lines)
+        self.filtered_lines = matching_lines
+        self._set_display(matching_lines)
         self.status_label.text = f'Showing {len(matching_lines)} matching lines'
 
     def clear_search(self, instance):
         """Clear search and restore original log"""
         self.search_input.text = ''
-        self.search_matches = []
+        self._reset_search_index()
+        self._cancel_filter()
         self.current_match_index = 0
         
         # Restore original log if it was filtered
-        if self.all_log_text:
-            self.log_display.text = self.all_log_text
-            self.all_log_text = ''
+        if self.filtered_lines is not None:
+            self.filtered_lines = None
+            self._show_ring()
         
         self.status_label.text = 'Search cleared'
 
     def on_case_sensitive_toggle(self, checkbox, value):
         """Handle case sensitive checkbox toggle"""
         self.case_sensitive = value
+        self._reset_search_index()
         if self.search_input.text:
             self.current_match_index = 0
             self.status_label.text = 'Case sensitive: ' + ('ON' if value else 'OFF')